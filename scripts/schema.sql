@@ -11,9 +11,10 @@ CREATE TABLE IF NOT EXISTS stations (
   max_date DATE
 );
 
--- Daily weather data table
+-- Daily weather data table, range-partitioned by year so bulk loads only
+-- touch the index of the partition they land in (per-year partitions are
+-- created by the import script)
 CREATE TABLE IF NOT EXISTS weather_daily (
-  id SERIAL PRIMARY KEY,
   station_id VARCHAR(20) NOT NULL,
   date DATE NOT NULL,
   month SMALLINT NOT NULL,
@@ -22,7 +23,12 @@ CREATE TABLE IF NOT EXISTS weather_daily (
   tmin SMALLINT,  -- Min temp in tenths of degrees F
   prcp SMALLINT,  -- Precipitation in hundredths of inches
   snow SMALLINT,  -- Snowfall in tenths of inches
-  UNIQUE(station_id, date)
+  PRIMARY KEY (station_id, date)
+) PARTITION BY RANGE (date);
+
+-- Unlogged staging table for bulk COPY loads (merged into weather_daily, then truncated)
+CREATE UNLOGGED TABLE IF NOT EXISTS weather_daily_stage (
+  LIKE weather_daily INCLUDING DEFAULTS
 );
 
 -- Index for fast lookups by station + month + day (across all years)